@@ -0,0 +1,280 @@
+"""
+Benchmark Store - Anonymized per-session utilization figures for peer benchmarks.
+Rows are appended to memory-mapped column files (NumPy); aggregates are kept
+incrementally and percentiles come from sorted indices in O(log n).
+"""
+
+import bisect
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", "benchmark_data")
+
+# Fewer sessions than this and benchmarks fall back to the static catalog
+BENCHMARK_MIN_SESSIONS = int(os.getenv("BENCHMARK_MIN_SESSIONS", "20"))
+
+# New values are kept in a small sorted buffer and merged into the main
+# sorted index once it grows past this size
+MERGE_THRESHOLD = 10000
+
+SECTORS = ["Other", "Technology", "Manufacturing", "Healthcare", "Retail", "Services"]
+SIZES = ["unknown", "micro", "small", "medium", "large"]
+
+# One file per column; row i is the same session in every file
+COLUMNS = {
+    "utilization": np.float32,
+    "sector": np.uint8,
+    "size": np.uint8,
+}
+
+# Sector keys are offset so one sorted array covers every sector:
+# key = sector * SECTOR_STRIDE + utilization, utilization in [0, 100]
+SECTOR_STRIDE = 1000.0
+
+
+def sector_code(sector: Optional[str]) -> int:
+    return SECTORS.index(sector) if sector in SECTORS else 0
+
+
+def size_code(size: Optional[str]) -> int:
+    return SIZES.index(size) if size in SIZES else 0
+
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive cross-process lock on `path` (flock on POSIX, msvcrt on Windows)"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            return
+
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                # LK_LOCK gives up after ~10 seconds; keep waiting
+                continue
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SortedIndex:
+    """
+    Sorted values for rank queries: a large sorted array plus a small sorted
+    buffer of recent inserts. Rank is two binary searches.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.main = np.sort(values.astype(np.float64))
+        self.buffer: List[float] = []
+
+    def insert(self, value: float):
+        bisect.insort(self.buffer, value)
+        if len(self.buffer) >= MERGE_THRESHOLD:
+            self.main = np.sort(np.concatenate([self.main, self.buffer]))
+            self.buffer = []
+
+    def count_below(self, value: float) -> int:
+        return int(np.searchsorted(self.main, value, side="left")) + bisect.bisect_left(self.buffer, value)
+
+    def value_at(self, rank: int) -> float:
+        """Value at a 0-based rank across both arrays (k-th smallest of two sorted sequences)"""
+        a, b = self.main, self.buffer
+        k = rank + 1
+        # Binary search on how many of the k smallest come from `a`
+        lo, hi = max(0, k - len(b)), min(k, len(a))
+        while lo < hi:
+            i = (lo + hi) // 2
+            j = k - i
+            if j > 0 and b[j - 1] > a[i]:
+                lo = i + 1
+            else:
+                hi = i
+        i, j = lo, k - lo
+        candidates = ([a[i - 1]] if i > 0 else []) + ([b[j - 1]] if j > 0 else [])
+        return float(max(candidates))
+
+
+class BenchmarkStore:
+    """
+    Append-only columnar store of session utilization figures.
+    Safe to share between worker processes: appends are serialized with a
+    file lock and each worker picks up rows written by the others on refresh.
+    Loading and appending do file I/O and sorting, so call them from a thread
+    (asyncio.to_thread), never directly on the event loop; `lock` guards the
+    in-memory state between those threads.
+    """
+
+    def __init__(self, directory: str = BENCHMARK_DIR):
+        self.directory = directory
+        self.lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self.count = 0
+        self.sum = 0.0
+        self.sector_count = np.zeros(len(SECTORS), dtype=np.int64)
+        self.sector_sum = np.zeros(len(SECTORS), dtype=np.float64)
+        self.size_count = np.zeros(len(SIZES), dtype=np.int64)
+        self.size_sum = np.zeros(len(SIZES), dtype=np.float64)
+        self.values = SortedIndex(np.empty(0))
+        self.sector_keys = SortedIndex(np.empty(0))
+        self.refresh()
+
+    def _path(self, column: str) -> str:
+        return os.path.join(self.directory, f"{column}.bin")
+
+    def _rows_on_disk(self) -> int:
+        path = self._path("utilization")
+        if not os.path.exists(path):
+            return 0
+        # Columns are written utilization-last, so its length bounds complete rows
+        return os.path.getsize(path) // np.dtype(COLUMNS["utilization"]).itemsize
+
+    def _column(self, column: str, start: int, stop: int) -> np.ndarray:
+        dtype = np.dtype(COLUMNS[column])
+        data = np.memmap(self._path(column), dtype=dtype, mode="r", offset=start * dtype.itemsize, shape=(stop - start,))
+        return np.array(data)
+
+    def refresh(self):
+        """Fold rows appended since the last refresh (by any worker) into the aggregates"""
+        with self.lock:
+            self._refresh()
+
+    def _refresh(self):
+        total = self._rows_on_disk()
+        if total <= self.count:
+            return
+
+        start = self.count
+        utilization = self._column("utilization", start, total).astype(np.float64)
+        sectors = self._column("sector", start, total)
+        sizes = self._column("size", start, total)
+
+        self.sector_count += np.bincount(sectors, minlength=len(SECTORS))[:len(SECTORS)]
+        self.sector_sum += np.bincount(sectors, weights=utilization, minlength=len(SECTORS))[:len(SECTORS)]
+        self.size_count += np.bincount(sizes, minlength=len(SIZES))[:len(SIZES)]
+        self.size_sum += np.bincount(sizes, weights=utilization, minlength=len(SIZES))[:len(SIZES)]
+        self.sum += float(utilization.sum())
+
+        keys = sectors * SECTOR_STRIDE + utilization
+        if start == 0 or len(utilization) >= MERGE_THRESHOLD:
+            self.values = SortedIndex(np.concatenate([self.values.main, self.values.buffer, utilization]))
+            self.sector_keys = SortedIndex(np.concatenate([self.sector_keys.main, self.sector_keys.buffer, keys]))
+        else:
+            for value, key in zip(utilization, keys):
+                self.values.insert(float(value))
+                self.sector_keys.insert(float(key))
+        self.count = total
+
+    def _repair(self):
+        """
+        Trim columns back to the last complete row. A writer that died mid-append
+        leaves extra values in the earlier columns, which would shift every
+        later row. Must be called with the append lock held.
+        """
+        rows = self._rows_on_disk()
+        for column, dtype in COLUMNS.items():
+            path = self._path(column)
+            size = rows * np.dtype(dtype).itemsize
+            if os.path.exists(path) and os.path.getsize(path) != size:
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+
+    def append(self, utilization: float, sector: Optional[str] = None, size: Optional[str] = None):
+        """Record one anonymized session figure"""
+        row = {
+            "sector": np.array([sector_code(sector)], dtype=COLUMNS["sector"]),
+            "size": np.array([size_code(size)], dtype=COLUMNS["size"]),
+            "utilization": np.array([min(max(utilization, 0.0), 100.0)], dtype=COLUMNS["utilization"]),
+        }
+        with self.lock:
+            with file_lock(os.path.join(self.directory, "append.lock")):
+                self._repair()
+                for column, value in row.items():
+                    with open(self._path(column), "ab") as f:
+                        f.write(value.tobytes())
+            self._refresh()
+
+    def percentile_of(self, utilization: float, sector: Optional[str] = None) -> Optional[float]:
+        """Share of sessions (overall or within a sector) scoring below `utilization`, 0-100"""
+        if sector in SECTORS:
+            code = sector_code(sector)
+            total = int(self.sector_count[code])
+            if total == 0:
+                return None
+            base = code * SECTOR_STRIDE
+            below = self.sector_keys.count_below(base + utilization) - self.sector_keys.count_below(base)
+        else:
+            total = self.count
+            if total == 0:
+                return None
+            below = self.values.count_below(utilization)
+        return round(100.0 * below / total, 1)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Overall utilization at quantile q (0-1), nearest rank"""
+        if self.count == 0:
+            return None
+        rank = min(self.count - 1, int(q * self.count))
+        return round(self.values.value_at(rank), 1)
+
+    def mean(self) -> Optional[float]:
+        return round(self.sum / self.count, 1) if self.count else None
+
+    def sector_means(self) -> Dict[str, float]:
+        return {
+            name: round(float(self.sector_sum[i] / self.sector_count[i]), 1)
+            for i, name in enumerate(SECTORS) if self.sector_count[i]
+        }
+
+    def size_means(self) -> Dict[str, float]:
+        return {
+            name: round(float(self.size_sum[i] / self.size_count[i]), 1)
+            for i, name in enumerate(SIZES) if self.size_count[i]
+        }
+
+
+    def summary(self) -> Dict:
+        """Current peer figures, refreshed from disk first"""
+        with self.lock:
+            self._refresh()
+            return {
+                "sessions": self.count,
+                "industryAverage": self.mean(),
+                "topPerformers": self.quantile(0.9),
+                "bottomPerformers": self.quantile(0.1),
+                "sectors": self.sector_means(),
+                "sizes": self.size_means(),
+            }
+
+
+_store: Optional[BenchmarkStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> BenchmarkStore:
+    """Shared store, opened (and indexed) on first use - blocking, call from a thread"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BenchmarkStore()
+    return _store
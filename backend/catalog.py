@@ -0,0 +1,24 @@
+"""
+Catalog Data - Static subsidy and benchmark data loaded from data/catalog.json.
+Kept out of Python source so importing the API stays cheap on cold starts.
+"""
+
+import os
+from typing import Dict, List
+
+import orjson
+
+
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "catalog.json")
+
+with open(CATALOG_PATH, "rb") as f:
+    _catalog = orjson.loads(f.read())
+
+# Simulated subsidy database used for analysis results
+SUBSIDY_DATABASE: List[Dict] = _catalog["subsidies"]
+
+# Fallback static data when scraping RVO.nl fails
+FALLBACK_SUBSIDIES: List[Dict] = _catalog["fallback_subsidies"]
+
+# Industry benchmark data for subsidy utilization
+BENCHMARK: Dict = _catalog["benchmark"]
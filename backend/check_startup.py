@@ -0,0 +1,106 @@
+"""
+Startup Check - Guards cold-start cost of the API.
+Measures `import main` with -X importtime against a budget, verifies heavy
+scraper dependencies stay lazy, and reports time-to-first-200 for `/`.
+
+The import checks also run in the test suite (tests/test_startup.py).
+
+Usage: python check_startup.py   (exits non-zero when a check fails)
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict
+
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time budget for `import main`, in milliseconds
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+
+# Only the live subsidy and benchmark endpoints need these; they must not load at startup
+LAZY_MODULES = ["httpx", "bs4", "rvo_scraper", "subsidy_sources", "numpy", "benchmark_store"]
+
+# Give up waiting for the first 200 after this many seconds
+FIRST_200_TIMEOUT = float(os.getenv("FIRST_200_TIMEOUT", "30"))
+
+
+def measure_imports() -> Dict[str, int]:
+    """Run `import main` in a fresh interpreter and return cumulative import times (us)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time:  self [us] | cumulative | imported package"
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def time_to_first_200() -> float:
+    """Start uvicorn and return seconds until GET / first answers 200"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < FIRST_200_TIMEOUT:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.02)
+        raise TimeoutError(f"No 200 from / within {FIRST_200_TIMEOUT}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> int:
+    failures = []
+
+    times = measure_imports()
+    total_ms = times["main"] / 1000
+    print(f"⏱️  import main: {total_ms:.0f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    for name, cumulative in sorted(times.items(), key=lambda t: -t[1])[:5]:
+        print(f"   {cumulative / 1000:8.1f} ms  {name}")
+    if total_ms > IMPORT_BUDGET_MS:
+        failures.append(f"import main took {total_ms:.0f} ms, over the {IMPORT_BUDGET_MS:.0f} ms budget")
+
+    eager = [name for name in LAZY_MODULES if name in times]
+    if eager:
+        failures.append(f"modules imported at startup but should be lazy: {', '.join(eager)}")
+
+    print(f"🚀 time to first 200 on /: {time_to_first_200() * 1000:.0f} ms")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ Startup checks passed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
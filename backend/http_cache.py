@@ -0,0 +1,138 @@
+"""
+HTTP Caching - Compressed, cacheable JSON responses for catalog endpoints.
+Bodies are serialized and compressed once per catalog version, then served
+with ETag, Cache-Control and Vary headers so browsers and CDNs can reuse them.
+"""
+
+import gzip
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+import orjson
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    # Runs on a cache miss inside the request, so favour speed over the last few percent
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, honouring q=0"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    candidates: List[str] = ["br", "gzip"] if brotli is not None else ["gzip"]
+    for encoding in candidates:
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > 0:
+            return encoding
+    return None
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluate If-None-Match, falling back to If-Modified-Since (RFC 9110 13.2.2)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have whole-second precision
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= since
+
+
+class CatalogResponseCache:
+    """
+    LRU cache of serialized (and lazily compressed) catalog bodies.
+    Entries are keyed by the caller, who must include the catalog version in the key.
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def _entry(self, key: str, build: Callable[[], dict]) -> Dict:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        body = orjson.dumps(build())
+        entry = {
+            "identity": body,
+            "etag": 'W/"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+        }
+        self.entries[key] = entry
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return entry
+
+    def respond(
+        self,
+        request: Request,
+        key: str,
+        build: Callable[[], dict],
+        max_age: int,
+        last_modified: Optional[datetime] = None,
+    ) -> Response:
+        """
+        Serve the body for `key`, building it with `build()` on a cache miss.
+        Answers 304 when the client already holds the current ETag or, without
+        If-None-Match, has a copy at least as new as `last_modified`.
+        """
+        entry = self._entry(key, build)
+        headers = {
+            "ETag": entry["etag"],
+            "Cache-Control": f"public, max-age={max(max_age, 0)}",
+            "Vary": "Accept-Encoding",
+        }
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+        if not_modified(request, entry["etag"], last_modified):
+            return Response(status_code=304, headers=headers)
+
+        body = entry["identity"]
+        encoding = None
+        if len(body) >= COMPRESSION_MIN_SIZE:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+
+        if encoding:
+            if encoding not in entry:
+                entry[encoding] = compress(body, encoding)
+            body = entry[encoding]
+            headers["Content-Encoding"] = encoding
+
+        return Response(content=body, media_type="application/json", headers=headers)
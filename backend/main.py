@@ -4,8 +4,9 @@ Handles document upload, AI analysis simulation, and subsidy detection.
 Production-ready with environment variable configuration.
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 import asyncio
@@ -13,18 +14,28 @@ import uuid
 from datetime import datetime
 import random
 import os
-from rvo_scraper import get_subsidies, FALLBACK_SUBSIDIES
+from catalog import SUBSIDY_DATABASE, FALLBACK_SUBSIDIES, BENCHMARK
+from profiling import ProfilingConfig, ProfileStore, ProfilingMiddleware
+from http_cache import CatalogResponseCache
+from rate_limit import RateLimitConfig, RateLimitMiddleware
+from result_export import EXPORT_FORMATS, stream_export
 
 app = FastAPI(
     title="Liquidity AI API",
     description="Backend API for capital leakage detection and subsidy recovery",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration - use environment variable or defaults
 cors_origins_str = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000")
 cors_origins = [origin.strip() for origin in cors_origins_str.split(",")]
 
+# Rate limiting - added before CORS so it runs inside it and 429/503 responses
+# still carry CORS headers the frontend can read
+rate_limit_config = RateLimitConfig()
+app.add_middleware(RateLimitMiddleware, config=rate_limit_config)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=cors_origins,
@@ -33,6 +44,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling - see profiling.py for the environment variables
+profiling_config = ProfilingConfig()
+profile_store = ProfileStore(profiling_config)
+app.add_middleware(ProfilingMiddleware, config=profiling_config, store=profile_store)
+
 # ============================================================================
 # DATA MODELS
 # ============================================================================
@@ -51,6 +67,7 @@ class BenchmarkData(BaseModel):
     you: int
     competitors: int
     industryAverage: int
+    percentile: Optional[float] = None
 
 class AnalysisResult(BaseModel):
     sessionId: str
@@ -78,151 +95,95 @@ analysis_sessions = {}
 email_alerts = {}
 
 # ============================================================================
-# SUBSIDY DATABASE (Simulated)
+# RESPONSE HELPERS
 # ============================================================================
 
-SUBSIDY_DATABASE = [
-    {
-        "id": "wbso-2024",
-        "item": "Onbenutte R&D Belastingvoordelen",
-        "subsidy": "WBSO Regeling",
-        "amount": -4800,
-        "category": "Fiscaal",
-        "description": "Afdrachtvermindering voor speur- en ontwikkelingswerk. Verlaagt de loonbelasting en sociale premies voor R&D-medewerkers.",
-        "deadline": "30 september 2024",
-        "eligibility": [
-            "Bedrijven met S&O-activiteiten",
-            "Minimaal 500 S&O-uren per jaar",
-            "Technisch nieuw product of proces"
-        ]
-    },
-    {
-        "id": "sde-2024",
-        "item": "Duurzame Energie Investering",
-        "subsidy": "SDE++ Subsidie",
-        "amount": -3200,
-        "category": "Energie",
-        "description": "Stimuleringsregeling Duurzame Energieproductie en Klimaattransitie voor hernieuwbare energieprojecten.",
-        "deadline": "Doorlopende aanvragen",
-        "eligibility": [
-            "Energieproductie uit hernieuwbare bronnen",
-            "CO2-reducerende projecten",
-            "Minimale projectomvang vereist"
-        ]
-    },
-    {
-        "id": "stap-2024",
-        "item": "Opleidingsbudget Werknemers",
-        "subsidy": "STAP Budget",
-        "amount": -2800,
-        "category": "Personeel",
-        "description": "Stimulering Arbeidsmarktpositie - budget voor scholing en ontwikkeling van werknemers.",
-        "deadline": "Doorlopende inschrijving",
-        "eligibility": [
-            "Nederlandse ingezetenen 18+",
-            "Geregistreerde opleidingsaanbieders",
-            "Maximaal €1.000 per persoon per jaar"
-        ]
-    },
-    {
-        "id": "mit-2024",
-        "item": "Digitale Transformatie",
-        "subsidy": "MIT Regeling",
-        "amount": -2100,
-        "category": "Digitaal",
-        "description": "MKB Innovatiestimulering Regio en Topsectoren - ondersteunt innovatie bij het MKB.",
-        "deadline": "April 2024 / September 2024",
-        "eligibility": [
-            "Midden- en kleinbedrijf (MKB)",
-            "Innovatie- of R&D-project",
-            "Samenwerking met kennisinstellingen"
-        ]
-    },
-    {
-        "id": "dhi-2024",
-        "item": "Export Ontwikkeling",
-        "subsidy": "DHI Subsidie",
-        "amount": -1300,
-        "category": "Export",
-        "description": "Demonstratieprojecten, Haalbaarheidsstudies en Investeringsvoorbereiding voor internationaal ondernemen.",
-        "deadline": "Doorlopende aanvragen",
-        "eligibility": [
-            "Nederlandse bedrijven met exportambitie",
-            "Projecten in opkomende markten",
-            "Demonstratie- of haalbaarheidsstudies"
-        ]
-    },
-    {
-        "id": "innovatie-2024",
-        "item": "Innovatiebox Voordelen",
-        "subsidy": "Innovatiebox",
-        "amount": -1800,
-        "category": "Fiscaal",
-        "description": "Verlaagd vennootschapsbelastingtarief (9%) voor winsten uit innovatieve activiteiten.",
-        "deadline": "Jaarlijkse belastingaangifte",
-        "eligibility": [
-            "Octrooien of WBSO-verklaring",
-            "Zelfontworpen immateriële activa",
-            "Aantoonbare innovatieactiviteiten"
-        ]
-    },
-    {
-        "id": "bmkb-2024",
-        "item": "MKB Kredietgarantie",
-        "subsidy": "BMKB Regeling",
-        "amount": -950,
-        "category": "Financiering",
-        "description": "Borgstelling MKB-kredieten - overheidsgarantie voor bankleningen aan MKB.",
-        "deadline": "Doorlopend beschikbaar",
-        "eligibility": [
-            "MKB-classificatie",
-            "Levensvatbaar ondernemingsplan",
-            "Banklening aanvraag"
-        ]
-    },
-    {
-        "id": "eia-2024",
-        "item": "Energie-Investeringsaftrek",
-        "subsidy": "EIA Regeling",
-        "amount": -2400,
-        "category": "Energie",
-        "description": "Extra fiscale aftrek voor investeringen in energiebesparende bedrijfsmiddelen en duurzame energie.",
-        "deadline": "Binnen 3 maanden na investering",
-        "eligibility": [
-            "Investering in erkende bedrijfsmiddelen",
-            "Minimaal €2.500 per bedrijfsmiddel",
-            "Opgenomen in de Energielijst"
-        ]
-    },
-    {
-        "id": "mia-vamil-2024",
-        "item": "Milieu-Investeringen",
-        "subsidy": "MIA/Vamil",
-        "amount": -1650,
-        "category": "Milieu",
-        "description": "Milieu-investeringsaftrek en willekeurige afschrijving voor milieuinvesteringen.",
-        "deadline": "Binnen 3 maanden na investering",
-        "eligibility": [
-            "Investering in milieulijst bedrijfsmiddelen",
-            "Nieuwe of eenmalige investeringen",
-            "Minimaal €2.500 per bedrijfsmiddel"
-        ]
-    },
-    {
-        "id": "tki-2024",
-        "item": "Samenwerkingsprojecten",
-        "subsidy": "TKI Toeslag",
-        "amount": -1200,
-        "category": "Innovatie",
-        "description": "Topconsortia voor Kennis en Innovatie - stimuleert publiek-private samenwerking.",
-        "deadline": "Jaarlijkse ronden",
-        "eligibility": [
-            "Samenwerking bedrijven en kennisinstellingen",
-            "Fundamenteel/industrieel onderzoek",
-            "Bijdrage aan nationale topsectoren"
-        ]
-    }
-]
+# Compressed catalog bodies, keyed by endpoint + catalog version + projection
+catalog_cache = CatalogResponseCache()
+
+# The static catalogs only change on deploy, so their version is the startup time
+CATALOG_VERSION = datetime.now()
+STATIC_CATALOG_MAX_AGE = int(os.getenv("STATIC_CATALOG_MAX_AGE", "3600"))
+FALLBACK_MAX_AGE = 60
+PEER_BENCHMARK_MAX_AGE = 300
+
+# Upper bound on session IDs in one bulk export request
+EXPORT_MAX_SESSIONS = int(os.getenv("EXPORT_MAX_SESSIONS", "100"))
+
+# Fields that may be requested with ?fields= on the catalog endpoints
+SUBSIDY_FIELDS = set(SUBSIDY_DATABASE[0])
+LIVE_SUBSIDY_FIELDS = set(FALLBACK_SUBSIDIES[0]) | {"last_updated", "schemeId", "sources"}
+
+
+def split_csv_param(value: Optional[str]) -> List[str]:
+    """Split a comma-separated query parameter into its non-empty, stripped parts"""
+    if not value:
+        return []
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def select_fields(fields: Optional[str], allowed: set) -> Optional[List[str]]:
+    """
+    Validate a ?fields= projection and normalize it (deduplicated, sorted) so
+    equivalent requests share one cache entry.
+    """
+    selected = split_csv_param(fields)
+    if not selected:
+        return None
+    unknown = set(selected) - allowed
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return sorted(set(selected))
+
+
+def project(items: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    """Keep only the requested fields of each item"""
+    if not fields:
+        return items
+    return [{f: item[f] for f in fields if f in item} for item in items]
+
+
+def session_benchmark(utilization: int, sector: Optional[str], size: Optional[str]) -> dict:
+    """
+    Compare a session's utilization against stored peer sessions, then record
+    it (anonymized) for future comparisons.
+    Does file I/O and may build the index, so run it with asyncio.to_thread.
+    """
+    # Imported on first use: NumPy is only needed once analyses come in
+    from benchmark_store import get_store, BENCHMARK_MIN_SESSIONS
+    
+    store = get_store()
+    with store.lock:
+        store.refresh()
+        if store.count >= BENCHMARK_MIN_SESSIONS:
+            benchmark = {
+                "you": utilization,
+                "competitors": int(round(store.quantile(0.75))),
+                "industryAverage": int(round(store.mean())),
+                "percentile": store.percentile_of(utilization, sector)
+            }
+        else:
+            # Not enough peers yet for meaningful figures
+            benchmark = {
+                "you": utilization,
+                "competitors": random.randint(60, 75),
+                "industryAverage": random.randint(55, 70)
+            }
+        
+        store.append(utilization, sector, size)
+    return benchmark
+
+
+def peer_benchmark_summary() -> Optional[dict]:
+    """
+    Peer figures from the store, or None while there are too few sessions.
+    Blocking (and imports NumPy on first use), run with asyncio.to_thread.
+    """
+    from benchmark_store import get_store, BENCHMARK_MIN_SESSIONS
+    
+    summary = get_store().summary()
+    return summary if summary["sessions"] >= BENCHMARK_MIN_SESSIONS else None
+
 
 # ============================================================================
 # API ENDPOINTS
@@ -282,8 +243,13 @@ async def upload_documents(files: List[UploadFile] = File(...)):
     }
 
 
-@app.post("/api/analyze/{session_id}")
-async def analyze_documents(session_id: str, background_tasks: BackgroundTasks):
+@app.post("/api/analyze/{session_id}", response_model=AnalysisResult)
+async def analyze_documents(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    sector: Optional[str] = Query(None, description="Business sector, used for peer benchmarks"),
+    size: Optional[str] = Query(None, description="Company size class: micro, small, medium or large")
+):
     """
     Trigger AI analysis on uploaded documents.
     Returns immediately with analysis ID, actual processing happens in background.
@@ -301,31 +267,94 @@ async def analyze_documents(session_id: str, background_tasks: BackgroundTasks):
     num_subsidies = random.randint(4, 7)
     selected_subsidies = random.sample(SUBSIDY_DATABASE, min(num_subsidies, len(SUBSIDY_DATABASE)))
     
-    # Randomize amounts slightly for realism
+    # Randomize amounts slightly for realism (on copies, the database stays untouched)
+    subsidies = []
     for subsidy in selected_subsidies:
         variance = random.uniform(0.8, 1.2)
-        subsidy["amount"] = round(subsidy["amount"] * variance, 0)
+        subsidies.append({**subsidy, "amount": float(round(subsidy["amount"] * variance, 0))})
     
-    total_leakage = sum(s["amount"] for s in selected_subsidies)
+    total_leakage = sum(s["amount"] for s in subsidies)
     
-    result = AnalysisResult(
-        sessionId=session_id,
-        totalLeakage=total_leakage,
-        subsidies=[SubsidyItem(**s) for s in selected_subsidies],
-        benchmark=BenchmarkData(
-            you=random.randint(18, 28),
-            competitors=random.randint(60, 75),
-            industryAverage=random.randint(55, 70)
-        ),
-        analyzedAt=datetime.now().isoformat(),
-        documentCount=len(session["files"])
-    )
+    benchmark = await asyncio.to_thread(session_benchmark, random.randint(18, 28), sector, size)
+    
+    # Built as a plain dict matching AnalysisResult: the subsidies come from our
+    # own database, so validating them again would only cost CPU per request
+    result = {
+        "sessionId": session_id,
+        "totalLeakage": total_leakage,
+        "subsidies": subsidies,
+        "benchmark": benchmark,
+        "analyzedAt": datetime.now().isoformat(),
+        "documentCount": len(session["files"])
+    }
     
     # Store result
     session["status"] = "completed"
-    session["result"] = result.model_dump()
+    session["result"] = result
+    
+    return ORJSONResponse(result)
+
+
+def is_completed(session_id: str) -> bool:
+    session = analysis_sessions.get(session_id)
+    return session is not None and session["status"] == "completed"
+
+
+def completed_results(session_ids: List[str]):
+    """Yield stored results one at a time, skipping unknown or unfinished sessions"""
+    for session_id in session_ids:
+        if is_completed(session_id):
+            yield analysis_sessions[session_id]["result"]
+
+
+def export_response(session_ids: List[str], export_format: str, filename: str) -> StreamingResponse:
+    media_type, extension = EXPORT_FORMATS[export_format]
+    return StreamingResponse(
+        stream_export(completed_results(session_ids), export_format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
+
+
+@app.get("/api/results/export")
+async def export_many_results(
+    sessions: str = Query(..., description="Comma-separated session IDs"),
+    export_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$")
+):
+    """
+    Stream analysis results of several sessions as one CSV or XLSX file.
+    Only the sessions named by the caller are exported; the session ID is the
+    access token for a result, as with /api/results/{session_id}.
+    """
+    session_ids = list(dict.fromkeys(split_csv_param(sessions)))
+    if not session_ids:
+        raise HTTPException(status_code=400, detail="No session IDs given")
+    if len(session_ids) > EXPORT_MAX_SESSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {EXPORT_MAX_SESSIONS} sessions per export"
+        )
+    if not any(is_completed(session_id) for session_id in session_ids):
+        raise HTTPException(status_code=404, detail="No completed sessions found")
     
-    return result
+    return export_response(session_ids, export_format, "liquidity-analysis-export")
+
+
+@app.get("/api/results/{session_id}/export")
+async def export_results(
+    session_id: str,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$")
+):
+    """
+    Stream analysis results of a session as CSV or XLSX.
+    """
+    if session_id not in analysis_sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    if analysis_sessions[session_id]["status"] != "completed":
+        raise HTTPException(status_code=409, detail="Analysis still in progress")
+    
+    return export_response([session_id], export_format, f"liquidity-analysis-{session_id}")
 
 
 @app.get("/api/results/{session_id}")
@@ -345,42 +374,83 @@ async def get_results(session_id: str):
             "message": "Analysis still in progress"
         }
     
-    return session["result"]
+    return ORJSONResponse(session["result"])
 
 
 @app.get("/api/subsidies")
-async def list_subsidies():
+async def list_subsidies(request: Request, fields: Optional[str] = Query(None, description="Comma-separated fields to return")):
     """
     Get the full list of available subsidies in the database.
     """
-    return {
-        "count": len(SUBSIDY_DATABASE),
-        "subsidies": SUBSIDY_DATABASE
-    }
+    selected = select_fields(fields, SUBSIDY_FIELDS)
+    return catalog_cache.respond(
+        request,
+        key=f"subsidies:{CATALOG_VERSION.isoformat()}:{selected}",
+        build=lambda: {
+            "count": len(SUBSIDY_DATABASE),
+            "subsidies": project(SUBSIDY_DATABASE, selected)
+        },
+        max_age=STATIC_CATALOG_MAX_AGE,
+        last_modified=CATALOG_VERSION
+    )
 
 
 @app.get("/api/subsidies/live")
-async def list_live_subsidies():
+async def list_live_subsidies(request: Request, fields: Optional[str] = Query(None, description="Comma-separated fields to return")):
     """
-    Get live subsidy data scraped from RVO.nl.
+    Get live subsidy data merged from all registered sources (RVO.nl and others).
     Returns real-time information about Dutch subsidies.
     """
+    # Imported on first use: the sources pull in httpx and BeautifulSoup,
+    # which no other endpoint needs
+    from subsidy_sources import scheduler
+    
+    selected = select_fields(fields, LIVE_SUBSIDY_FIELDS)
     try:
-        subsidies = await get_subsidies()
-        return {
-            "count": len(subsidies),
-            "subsidies": subsidies,
-            "source": "RVO.nl",
-            "cached": True  # Data is cached for 1 hour
-        }
+        await scheduler.refresh()
+        version = scheduler.version()
+        if version is None:
+            # No source has data yet - let clients retry soon instead of pinning fallback data
+            load, source = (lambda: FALLBACK_SUBSIDIES), "fallback"
+            version, max_age, last_modified = "fallback", FALLBACK_MAX_AGE, CATALOG_VERSION
+        else:
+            load, source = scheduler.catalog, ", ".join(scheduler.labels())
+            max_age, last_modified = scheduler.max_age(), scheduler.last_updated()
+        
+        def build():
+            subsidies = load()
+            return {
+                "count": len(subsidies),
+                "subsidies": project(subsidies, selected),
+                "source": source,
+                "cached": True  # Each source is cached for its own TTL
+            }
+        
+        return catalog_cache.respond(
+            request,
+            key=f"live:{version}:{selected}",
+            build=build,
+            max_age=max_age,
+            last_modified=last_modified
+        )
     except Exception as e:
         # Fallback to static data if scraping fails
-        return {
+        return ORJSONResponse({
             "count": len(FALLBACK_SUBSIDIES),
-            "subsidies": FALLBACK_SUBSIDIES,
+            "subsidies": project(FALLBACK_SUBSIDIES, selected),
             "source": "fallback",
             "error": str(e)
-        }
+        })
+
+
+@app.get("/api/subsidies/sources")
+async def list_subsidy_sources():
+    """
+    Get refresh status of each live subsidy source.
+    """
+    from subsidy_sources import scheduler
+    
+    return {"sources": scheduler.status()}
 
 
 @app.get("/api/subsidy/{subsidy_id}")
@@ -440,29 +510,76 @@ async def cancel_email_alert(alert_id: str):
 
 
 @app.get("/api/benchmark")
-async def get_benchmark():
+async def get_benchmark(request: Request):
     """
     Get industry benchmark data for subsidy utilization.
+    Computed from stored peer sessions once there are enough of them.
     """
+    peer = await asyncio.to_thread(peer_benchmark_summary)
+    if peer is None:
+        return catalog_cache.respond(
+            request,
+            key=f"benchmark:{CATALOG_VERSION.isoformat()}",
+            build=lambda: {**BENCHMARK, "source": "static"},
+            max_age=STATIC_CATALOG_MAX_AGE,
+            last_modified=CATALOG_VERSION
+        )
+    
+    # Measured figures only: sectors without stored sessions are left out
+    # rather than padded with static numbers ("trending" has no peer data yet)
+    def build():
+        return {
+            **BENCHMARK,
+            **peer,
+            "source": "peers"
+        }
+    
+    # Every new session changes the figures, so key on the row count and keep max-age short
+    return catalog_cache.respond(
+        request,
+        key=f"benchmark:sessions:{peer['sessions']}",
+        build=build,
+        max_age=PEER_BENCHMARK_MAX_AGE
+    )
+
+
+# ============================================================================
+# ADMIN ENDPOINTS
+# ============================================================================
+
+def require_profiling_secret(secret: Optional[str]):
+    if not profiling_config.secret_matches(secret):
+        raise HTTPException(status_code=403, detail="Invalid profiling secret")
+
+
+@app.get("/api/admin/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    """
+    List recently captured request profiles, newest first.
+    """
+    require_profiling_secret(x_profile)
+    profiles = await asyncio.to_thread(profile_store.list_profiles)
     return {
-        "industryAverage": 65,
-        "topPerformers": 85,
-        "bottomPerformers": 20,
-        "sectors": {
-            "Technology": 72,
-            "Manufacturing": 58,
-            "Healthcare": 61,
-            "Retail": 45,
-            "Services": 52
-        },
-        "trending": [
-            {"name": "SDE++", "growth": "+15%"},
-            {"name": "WBSO", "growth": "+8%"},
-            {"name": "MIT", "growth": "+12%"}
-        ]
+        "count": len(profiles),
+        "format": profiling_config.output_format,
+        "profiles": profiles
     }
 
 
+@app.get("/api/admin/profiles/{name}")
+async def download_profile(name: str, x_profile: Optional[str] = Header(None)):
+    """
+    Download a single captured profile.
+    """
+    require_profiling_secret(x_profile)
+    path = profile_store.path_for(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    media_type = "application/json" if name.endswith(".json") else "text/plain"
+    return FileResponse(path, media_type=media_type, filename=name)
+
+
 # ============================================================================
 # STARTUP EVENT
 # ============================================================================
@@ -471,6 +588,11 @@ async def get_benchmark():
 async def startup_event():
     print("🚀 Liquidity AI Backend starting...")
     print(f"📡 CORS enabled for: {cors_origins}")
+    if rate_limit_config.enabled:
+        backend = "redis" if rate_limit_config.redis_url else "in-memory"
+        print(f"🚦 Rate limiting enabled ({backend})")
+    if profiling_config.enabled or profiling_config.secret:
+        print(f"🔬 Profiling enabled (sample rate {profiling_config.sample_rate}, output {profiling_config.output_dir})")
     print("✅ API ready")
     print("📚 Docs available at /docs")
 
@@ -0,0 +1,243 @@
+"""
+Request Profiling - Opt-in sampling profiler for slow endpoints.
+Captures collapsed stacks or speedscope profiles per endpoint to a local directory.
+"""
+
+import asyncio
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class ProfilingConfig:
+    """
+    Profiling settings, read from environment variables
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.secret = os.getenv("PROFILING_SECRET", "")
+        self.sample_rate = float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))
+        self.interval = float(os.getenv("PROFILING_INTERVAL_MS", "5")) / 1000
+        self.output_dir = os.getenv("PROFILING_DIR", "profiles")
+        self.output_format = os.getenv("PROFILING_FORMAT", "collapsed")
+        self.max_profiles = int(os.getenv("PROFILING_MAX_PROFILES", "200"))
+
+    def secret_matches(self, candidate: Optional[str]) -> bool:
+        """Constant-time comparison against PROFILING_SECRET; False when no secret is set"""
+        if not self.secret or candidate is None:
+            return False
+        return hmac.compare_digest(candidate.encode("latin-1"), self.secret.encode("latin-1"))
+
+    @property
+    def extension(self) -> str:
+        return ".speedscope.json" if self.output_format == "speedscope" else ".folded"
+
+
+class StackSampler:
+    """
+    Samples the call stacks of every thread in the process from a background
+    thread, so work offloaded with asyncio.to_thread (parsing, file I/O) is
+    captured alongside the event loop. Each stack is rooted at its thread name;
+    idle thread-pool workers are skipped.
+    Overhead is one sys._current_frames() lookup per interval.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Signal the sampler to stop; returns immediately"""
+        self._stop.set()
+
+    def join(self):
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id, str(thread_id))
+                if name.startswith("profiling-sampler") or _is_idle_worker(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(f"thread {name}")
+                stack.reverse()
+                self.samples[tuple(stack)] += 1
+
+
+def _is_idle_worker(frame) -> bool:
+    """A thread-pool worker waiting on its queue (to_thread / run_in_executor)"""
+    code = frame.f_code
+    return code.co_name == "_worker" and code.co_filename.endswith(os.path.join("concurrent", "futures", "thread.py"))
+
+
+def to_collapsed(samples: Counter) -> str:
+    """Render samples in Brendan Gregg's collapsed-stack format"""
+    lines = [";".join(stack) + f" {count}" for stack, count in samples.most_common()]
+    return "\n".join(lines) + "\n"
+
+
+def to_speedscope(samples: Counter, name: str, interval: float) -> str:
+    """Render samples as a speedscope sampled profile"""
+    frames: List[Dict] = []
+    frame_index: Dict[str, int] = {}
+    stacks = []
+    weights = []
+
+    for stack, count in samples.items():
+        indices = []
+        for entry in stack:
+            if entry not in frame_index:
+                frame_index[entry] = len(frames)
+                frames.append({"name": entry})
+            indices.append(frame_index[entry])
+        stacks.append(indices)
+        weights.append(count * interval * 1000)
+
+    return json.dumps({
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": stacks,
+            "weights": weights,
+        }],
+        "name": name,
+        "exporter": "liquidity-ai",
+    })
+
+
+class ProfileStore:
+    """
+    Writes profiles to a local directory and lists recent ones
+    """
+
+    def __init__(self, config: ProfilingConfig):
+        self.config = config
+
+    def save(self, endpoint: str, samples: Counter, duration: float) -> Optional[str]:
+        if not samples:
+            return None
+
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        slug = re.sub(r"[^a-zA-Z0-9]+", "_", endpoint).strip("_") or "root"
+        timestamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        filename = f"{slug}__{timestamp}__{int(duration * 1000)}ms{self.config.extension}"
+
+        if self.config.output_format == "speedscope":
+            content = to_speedscope(samples, endpoint, self.config.interval)
+        else:
+            content = to_collapsed(samples)
+
+        with open(os.path.join(self.config.output_dir, filename), "w", encoding="utf-8") as f:
+            f.write(content)
+
+        self._prune()
+        return filename
+
+    def list_profiles(self) -> List[Dict]:
+        if not os.path.isdir(self.config.output_dir):
+            return []
+
+        profiles = []
+        for entry in os.scandir(self.config.output_dir):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            profiles.append({
+                "name": entry.name,
+                "endpoint": entry.name.split("__")[0],
+                "size": stat.st_size,
+                "createdAt": datetime.fromtimestamp(stat.st_mtime).isoformat()
+            })
+        profiles.sort(key=lambda p: p["createdAt"], reverse=True)
+        return profiles
+
+    def path_for(self, name: str) -> Optional[str]:
+        """Resolve a profile name to a path, rejecting anything outside the directory"""
+        if os.path.basename(name) != name:
+            return None
+        path = os.path.join(self.config.output_dir, name)
+        return path if os.path.isfile(path) else None
+
+    def _prune(self):
+        profiles = self.list_profiles()
+        for profile in profiles[self.config.max_profiles:]:
+            try:
+                os.remove(os.path.join(self.config.output_dir, profile["name"]))
+            except OSError:
+                pass
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a sampled fraction of requests.
+
+    A request is profiled when profiling is enabled and it wins the sample-rate
+    draw, or when it carries an `X-Profile` header matching PROFILING_SECRET.
+    The sampler watches every thread of the worker process, so concurrent
+    requests on the same worker show up in each other's profiles.
+    """
+
+    def __init__(self, app, config: ProfilingConfig, store: ProfileStore):
+        self.app = app
+        self.config = config
+        self.store = store
+
+    def should_profile(self, scope) -> bool:
+        if scope["path"].startswith("/api/admin/profiles"):
+            return False
+        if self.config.secret:
+            for key, value in scope.get("headers", []):
+                if key == b"x-profile":
+                    return self.config.secret_matches(value.decode("latin-1"))
+        return self.config.enabled and random.random() < self.config.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(self.config.interval)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration = time.perf_counter() - started
+            # Stop sampling right away, even if the await below is cancelled
+            sampler.stop()
+            route = scope.get("route")
+            endpoint = f"{scope['method']} {getattr(route, 'path', scope['path'])}"
+            # Joining the sampler and writing the file are blocking, keep them off the event loop
+            await asyncio.to_thread(self._finish, sampler, endpoint, duration)
+
+    def _finish(self, sampler: StackSampler, endpoint: str, duration: float):
+        sampler.join()
+        try:
+            self.store.save(endpoint, sampler.samples, duration)
+        except OSError as e:
+            print(f"Error writing profile for {endpoint}: {e}")
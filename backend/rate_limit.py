@@ -0,0 +1,208 @@
+"""
+Rate Limiting - Per-client token buckets and in-flight caps for expensive routes.
+Keeps one noisy client (or retry storm) from starving everyone else.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+
+# Route classes, matched on method + path prefix
+ROUTE_CLASSES = [
+    ("POST", "/api/upload", "upload"),
+    ("POST", "/api/analyze/", "analyze"),
+]
+DEFAULT_ROUTE_CLASS = "read"
+
+# Health checks and docs are never limited
+EXEMPT_PATHS = {"/", "/docs", "/redoc", "/openapi.json"}
+
+
+def parse_rate(value: str) -> Tuple[float, float]:
+    """Parse "count/seconds" into (tokens per second, burst size)"""
+    count, _, seconds = value.partition("/")
+    try:
+        burst, period = float(count), float(seconds or 1)
+    except ValueError:
+        raise ValueError(f"Invalid rate {value!r}, expected count/seconds such as 10/60")
+    if burst < 1 or period <= 0:
+        raise ValueError(f"Invalid rate {value!r}: count must be at least 1 and seconds positive")
+    return burst / period, burst
+
+
+class RateLimitConfig:
+    """
+    Rate limit settings, read from environment variables
+    """
+
+    def __init__(self):
+        self.enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.rates: Dict[str, Tuple[float, float]] = {
+            "upload": parse_rate(os.getenv("RATE_LIMIT_UPLOAD", "10/60")),
+            "analyze": parse_rate(os.getenv("RATE_LIMIT_ANALYZE", "20/60")),
+            "read": parse_rate(os.getenv("RATE_LIMIT_READ", "120/60")),
+        }
+        self.max_inflight: Dict[str, int] = {
+            "upload": int(os.getenv("MAX_INFLIGHT_UPLOAD", "8")),
+            "analyze": int(os.getenv("MAX_INFLIGHT_ANALYZE", "16")),
+        }
+        # Number of trusted reverse proxies in front of the app. Each appends the
+        # address it saw to X-Forwarded-For, so the client is `proxy_hops` entries
+        # from the right; anything further left is client-controlled.
+        self.proxy_hops = int(os.getenv("RATE_LIMIT_PROXY_HOPS", "0"))
+        self.redis_url = os.getenv("RATE_LIMIT_REDIS_URL", "")
+
+
+class MemoryBackend:
+    """
+    In-process token buckets. Limits are per worker.
+    Kept in LRU order and capped at MAX_BUCKETS; evicting the least recently
+    seen client only resets its bucket to full.
+    """
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """Take one token; returns 0 when allowed, else seconds until a token is available"""
+        now = time.monotonic()
+        tokens, last = self.buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / rate
+
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        if len(self.buckets) > self.MAX_BUCKETS:
+            self.buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisBackend:
+    """
+    Token buckets in Redis, so limits hold across workers and replicas.
+    """
+
+    SCRIPT = """
+    local tokens_ts = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local tokens = tonumber(tokens_ts[1]) or burst
+    local ts = tonumber(tokens_ts[2]) or now
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+        self.client = redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        try:
+            result = await self.script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()])
+            return float(result)
+        except Exception as e:
+            # Fail open - an unavailable Redis must not take the API down with it
+            print(f"Rate limit backend error: {e}")
+            return 0.0
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-client token buckets per route class, plus a
+    per-worker cap on concurrent requests for the expensive route classes.
+    Rejections are fast 429 (client over its rate) or 503 (worker saturated)
+    responses with a Retry-After header.
+    """
+
+    def __init__(self, app, config: RateLimitConfig):
+        self.app = app
+        self.config = config
+        self.backend = RedisBackend(config.redis_url) if config.redis_url else MemoryBackend()
+        self.inflight: Dict[str, int] = {name: 0 for name in config.max_inflight}
+
+    def route_class(self, method: str, path: str) -> str:
+        for route_method, prefix, name in ROUTE_CLASSES:
+            if method == route_method and path.startswith(prefix):
+                return name
+        return DEFAULT_ROUTE_CLASS
+
+    def client_id(self, scope) -> str:
+        hops = self.config.proxy_hops
+        if hops > 0:
+            for key, value in scope.get("headers", []):
+                if key == b"x-forwarded-for":
+                    hosts = [host.strip() for host in value.decode("latin-1").split(",")]
+                    if len(hosts) >= hops:
+                        return hosts[-hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def reject(self, send, status: int, detail: str, retry_after: float):
+        body = orjson.dumps({"detail": detail})
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.config.enabled
+            or scope["method"] == "OPTIONS"
+            or scope["path"] in EXEMPT_PATHS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        route_class = self.route_class(scope["method"], scope["path"])
+        rate, burst = self.config.rates[route_class]
+        retry_after = await self.backend.take(f"{route_class}:{self.client_id(scope)}", rate, burst)
+        if retry_after > 0:
+            await self.reject(send, 429, "Too many requests", retry_after)
+            return
+
+        limit: Optional[int] = self.config.max_inflight.get(route_class)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        if self.inflight[route_class] >= limit:
+            await self.reject(send, 503, "Server busy, please retry", 1)
+            return
+
+        self.inflight[route_class] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.inflight[route_class] -= 1
@@ -0,0 +1,171 @@
+"""
+Result Export - Streams analysis results as CSV or XLSX.
+Rows are generated one session at a time and flushed in chunks, so memory
+stays constant no matter how many sessions or subsidies are exported.
+"""
+
+import csv
+import io
+import re
+import zipfile
+from typing import Any, Dict, Iterable, Iterator, List
+from xml.sax.saxutils import escape
+
+
+# Flush output once this many bytes are buffered
+CHUNK_SIZE = 64 * 1024
+
+# Excel's sheet limit, header row included
+XLSX_MAX_ROWS = 1048576
+
+EXPORT_COLUMNS = [
+    ("Session", lambda result, subsidy: result["sessionId"]),
+    ("Item", lambda result, subsidy: subsidy["item"]),
+    ("Subsidy", lambda result, subsidy: subsidy["subsidy"]),
+    ("Category", lambda result, subsidy: subsidy["category"]),
+    ("Amount", lambda result, subsidy: subsidy["amount"]),
+    ("Deadline", lambda result, subsidy: subsidy.get("deadline") or ""),
+    ("Analyzed At", lambda result, subsidy: result["analyzedAt"]),
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
+
+
+def iter_rows(results: Iterable[Dict]) -> Iterator[List[Any]]:
+    """One row per subsidy, across all results"""
+    for result in results:
+        for subsidy in result["subsidies"]:
+            yield [getter(result, subsidy) for _, getter in EXPORT_COLUMNS]
+
+
+def stream_csv(results: Iterable[Dict]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel opens the file as UTF-8 (€, ë, ...)
+    buffer.write("\ufeff")
+    writer.writerow([header for header, _ in EXPORT_COLUMNS])
+
+    for row in iter_rows(results):
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+# ============================================================================
+# XLSX
+# ============================================================================
+
+XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Analyse" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_ILLEGAL_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def xlsx_cell(value: Any) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def xlsx_row(values: List[Any]) -> str:
+    return "<row>" + "".join(xlsx_cell(v) for v in values) + "</row>"
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Unseekable write target for ZipFile; collects bytes until drained.
+    ZipFile falls back to data descriptors, so entries never need rewriting.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        self.size = 0
+        return data
+
+
+def stream_xlsx(results: Iterable[Dict]) -> Iterator[bytes]:
+    """
+    Minimal single-sheet workbook with inline strings, zipped on the fly.
+    Rows beyond Excel's sheet limit are dropped.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in XLSX_STATIC_PARTS.items():
+            workbook.writestr(name, content)
+
+        with workbook.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(xlsx_row([header for header, _ in EXPORT_COLUMNS]).encode("utf-8"))
+
+            written = 1
+            for row in iter_rows(results):
+                if written >= XLSX_MAX_ROWS:
+                    break
+                sheet.write(xlsx_row(row).encode("utf-8"))
+                written += 1
+                if sink.size >= CHUNK_SIZE:
+                    yield sink.drain()
+
+            sheet.write(b"</sheetData></worksheet>")
+
+    yield sink.drain()
+
+
+def stream_export(results: Iterable[Dict], export_format: str) -> Iterator[bytes]:
+    if export_format == "xlsx":
+        return stream_xlsx(results)
+    return stream_csv(results)
@@ -10,6 +10,9 @@ import asyncio
 from datetime import datetime
 import re
 
+# Fallback static data when scraping fails
+from catalog import FALLBACK_SUBSIDIES
+
 
 class RVOSubsidyScraper:
     """
@@ -83,7 +86,8 @@ class RVOSubsidyScraper:
             print(f"Error fetching {url}: {e}")
             return None
     
-    def parse_subsidy_page(self, html: str, subsidy_info: dict) -> Dict:
+    @staticmethod
+    def parse_subsidy_page(html: str, subsidy_info: dict) -> Dict:
         """Parse a single subsidy page for relevant information"""
         soup = BeautifulSoup(html, 'html.parser')
         
@@ -149,6 +153,20 @@ class RVOSubsidyScraper:
         
         return result
     
+    async def fetch_all_pages(self) -> List[Dict]:
+        """Fetch every known subsidy page; returns {"info", "html"} for each page that loaded"""
+        pages = []
+        
+        for subsidy_info in self.SUBSIDY_SOURCES:
+            html = await self.fetch_page(subsidy_info["url"])
+            if html:
+                pages.append({"info": subsidy_info, "html": html})
+            
+            # Be respectful - small delay between requests
+            await asyncio.sleep(0.5)
+        
+        return pages
+    
     async def scrape_all_subsidies(self) -> List[Dict]:
         """Scrape all known subsidy pages"""
         
@@ -158,16 +176,8 @@ class RVOSubsidyScraper:
             if age < self.cache_duration:
                 return self.cache.get("subsidies", [])
         
-        subsidies = []
-        
-        for subsidy_info in self.SUBSIDY_SOURCES:
-            html = await self.fetch_page(subsidy_info["url"])
-            if html:
-                parsed = self.parse_subsidy_page(html, subsidy_info)
-                subsidies.append(parsed)
-            
-            # Be respectful - small delay between requests
-            await asyncio.sleep(0.5)
+        pages = await self.fetch_all_pages()
+        subsidies = [self.parse_subsidy_page(page["html"], page["info"]) for page in pages]
         
         # Update cache
         self.cache["subsidies"] = subsidies
@@ -199,123 +209,6 @@ class RVOSubsidyScraper:
         return results
 
 
-# Fallback static data when scraping fails
-FALLBACK_SUBSIDIES = [
-    {
-        "id": "wbso-2024",
-        "name": "WBSO",
-        "category": "Fiscaal",
-        "title": "WBSO - Afdrachtvermindering speur- en ontwikkelingswerk",
-        "description": "De WBSO is een fiscale regeling waarmee u de loonkosten van uw R&D-medewerkers kunt verlagen. U betaalt minder loonheffingen en premies voor werknemers die speur- en ontwikkelingswerk doen.",
-        "deadline": "30 september 2024",
-        "status": "Open",
-        "amount_info": "Tot 32% afdrachtvermindering",
-        "eligibility": [
-            "Bedrijven met S&O-activiteiten in Nederland",
-            "Minimaal 500 S&O-uren per jaar",
-            "Technisch nieuw product, proces of programmatuur"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/wbso"
-    },
-    {
-        "id": "sde-2024",
-        "name": "SDE++",
-        "category": "Energie",
-        "title": "SDE++ - Stimulering Duurzame Energieproductie en Klimaattransitie",
-        "description": "De SDE++ subsidie is bedoeld voor bedrijven die hernieuwbare energie produceren of CO2-reducerende technieken toepassen. De subsidie compenseert het verschil tussen de kostprijs van duurzame energie en de marktprijs.",
-        "deadline": "Najaar 2024",
-        "status": "Open",
-        "amount_info": "Afhankelijk van technologie en productie",
-        "eligibility": [
-            "Energieproductie uit hernieuwbare bronnen",
-            "CO2-reducerende maatregelen",
-            "Minimale projectomvang vereist"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/sde"
-    },
-    {
-        "id": "mit-2024",
-        "name": "MIT",
-        "category": "Innovatie",
-        "title": "MIT - MKB Innovatiestimulering Regio en Topsectoren",
-        "description": "De MIT-regeling stimuleert innovatie bij het MKB. U kunt subsidie krijgen voor haalbaarheidsprojecten, R&D-samenwerkingsprojecten en kennisvouchers.",
-        "deadline": "Meerdere rondes per jaar",
-        "status": "Open",
-        "amount_info": "Tot 40% subsidie op projectkosten",
-        "eligibility": [
-            "MKB-onderneming",
-            "Innovatie- of R&D-project",
-            "Samenwerking met kennisinstelling (bij R&D)"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/mit"
-    },
-    {
-        "id": "eia-2024",
-        "name": "EIA",
-        "category": "Energie",
-        "title": "EIA - Energie-investeringsaftrek",
-        "description": "Met de EIA kunt u fiscaal voordeel behalen bij investeringen in energiebesparende bedrijfsmiddelen en duurzame energie. U mag een percentage van de investering aftrekken van de fiscale winst.",
-        "deadline": "Binnen 3 maanden na investering",
-        "status": "Open",
-        "amount_info": "45,5% extra aftrek in 2024",
-        "eligibility": [
-            "Investering in bedrijfsmiddel op de Energielijst",
-            "Minimaal €2.500 per bedrijfsmiddel",
-            "Aanvraag binnen 3 maanden na opdracht"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/eia"
-    },
-    {
-        "id": "mia-vamil-2024",
-        "name": "MIA/Vamil",
-        "category": "Milieu",
-        "title": "MIA/Vamil - Milieu-investeringsaftrek en Willekeurige afschrijving",
-        "description": "Met MIA krijgt u een extra aftrekmogelijkheid van de fiscale winst. Met Vamil mag u zelf bepalen wanneer u afschrijft. Hiermee krijgt u een liquiditeits- en rentevoordeel.",
-        "deadline": "Binnen 3 maanden na investering",
-        "status": "Open",
-        "amount_info": "Tot 45% MIA + Vamil",
-        "eligibility": [
-            "Investering in bedrijfsmiddel op de Milieulijst",
-            "Minimaal €2.500 per bedrijfsmiddel",
-            "Aanvraag binnen 3 maanden na opdracht"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/mia-vamil"
-    },
-    {
-        "id": "innovatiebox-2024",
-        "name": "Innovatiebox",
-        "category": "Fiscaal",
-        "title": "Innovatiebox - Verlaagd vennootschapsbelastingtarief",
-        "description": "Met de Innovatiebox betaalt u een verlaagd tarief vennootschapsbelasting (9% in plaats van tot 25,8%) over de winst die u behaalt met innovatieve activiteiten.",
-        "deadline": "Jaarlijkse belastingaangifte",
-        "status": "Open",
-        "amount_info": "9% VPB-tarief op innovatiewinst",
-        "eligibility": [
-            "WBSO-verklaring of octrooi",
-            "Zelfontworpen immaterieel activum",
-            "Aantoonbare innovatieactiviteiten"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/innovatiebox"
-    },
-    {
-        "id": "bmkb-2024",
-        "name": "BMKB",
-        "category": "Financiering",
-        "title": "BMKB - Borgstelling MKB-kredieten",
-        "description": "Met de BMKB garandeert de overheid een deel van uw banklening. Hierdoor kunt u makkelijker financiering krijgen als u onvoldoende zekerheden heeft.",
-        "deadline": "Doorlopend beschikbaar",
-        "status": "Open",
-        "amount_info": "Borgstelling tot 90% van krediet",
-        "eligibility": [
-            "MKB-onderneming",
-            "Levensvatbaar ondernemingsplan",
-            "Onvoldoende eigen zekerheden"
-        ],
-        "url": "https://www.rvo.nl/subsidies-financiering/bmkb"
-    }
-]
-
-
 async def get_subsidies() -> List[Dict]:
     """
     Main function to get subsidies - tries scraping first, falls back to static data
@@ -0,0 +1,243 @@
+"""
+Subsidy Sources - Pluggable live subsidy sources merged into one catalog.
+Every registered source refreshes concurrently on its own TTL; a failing or
+slow source keeps serving its last good data without blocking the others.
+"""
+
+import abc
+import asyncio
+import hashlib
+import os
+import re
+import unicodedata
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+# How long a request waits for due refreshes before serving what is cached
+REFRESH_WAIT = float(os.getenv("SOURCE_REFRESH_WAIT", "15"))
+
+# Hard limit on a single source refresh; the task is cancelled after this
+REFRESH_TIMEOUT = float(os.getenv("SOURCE_REFRESH_TIMEOUT", "120"))
+
+# After a failed refresh, wait this long before trying the source again
+RETRY_AFTER_FAILURE = float(os.getenv("SOURCE_RETRY_AFTER_FAILURE", "60"))
+
+
+def normalize_scheme_id(name: str) -> str:
+    """
+    Normalize a scheme name or id so the same scheme from different sources
+    collapses to one key: "MIA/Vamil" and "mia-vamil-2024" both become "mia-vamil".
+    """
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    text = re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+    return re.sub(r"-(19|20)\d{2}$", "", text)
+
+
+class SubsidySource(abc.ABC):
+    """
+    Base class for a live subsidy source.
+
+    Subclasses implement `fetch` (network I/O, returns raw data) and `parse`
+    (raw data to subsidy dicts). `fingerprint` identifies raw data so an
+    unchanged source is not parsed again.
+    """
+
+    name = ""
+    label = ""
+    ttl = 3600
+
+    @abc.abstractmethod
+    async def fetch(self) -> Any:
+        ...
+
+    @abc.abstractmethod
+    def parse(self, raw: Any) -> List[Dict]:
+        ...
+
+    def fingerprint(self, raw: Any) -> str:
+        return hashlib.sha1(repr(raw).encode()).hexdigest()
+
+    def scheme_id(self, item: Dict) -> str:
+        return normalize_scheme_id(item.get("name") or item["id"])
+
+
+class RVOSource(SubsidySource):
+    """
+    RVO.nl scheme pages, scraped with RVOSubsidyScraper
+    """
+
+    name = "rvo"
+    label = "RVO.nl"
+    ttl = 3600
+
+    async def fetch(self) -> List[Dict]:
+        from rvo_scraper import RVOSubsidyScraper
+
+        scraper = RVOSubsidyScraper()
+        try:
+            pages = await scraper.fetch_all_pages()
+        finally:
+            await scraper.close()
+
+        # A partial result would replace the full catalog from the last refresh;
+        # fail instead so the scheduler keeps serving that one
+        fetched = {page["info"]["url"] for page in pages}
+        missing = [info["name"] for info in RVOSubsidyScraper.SUBSIDY_SOURCES if info["url"] not in fetched]
+        if missing:
+            raise RuntimeError(f"could not fetch {', '.join(missing)}")
+        return pages
+
+    def parse(self, raw: List[Dict]) -> List[Dict]:
+        from rvo_scraper import RVOSubsidyScraper
+
+        return [RVOSubsidyScraper.parse_subsidy_page(page["html"], page["info"]) for page in raw]
+
+    def fingerprint(self, raw: List[Dict]) -> str:
+        digest = hashlib.sha1()
+        for page in raw:
+            digest.update(page["info"]["url"].encode())
+            digest.update(page["html"].encode())
+        return digest.hexdigest()
+
+
+# Registered sources, in priority order: on duplicates the first source wins
+SOURCE_REGISTRY: List[SubsidySource] = []
+
+
+def register_source(source: SubsidySource):
+    if any(s.name == source.name for s in SOURCE_REGISTRY):
+        raise ValueError(f"Subsidy source {source.name!r} is already registered")
+    SOURCE_REGISTRY.append(source)
+
+
+register_source(RVOSource())
+
+
+class SourceState:
+    """
+    Last good result and refresh bookkeeping for one source
+    """
+
+    def __init__(self, source: SubsidySource):
+        self.source = source
+        self.items: List[Dict] = []
+        self.fingerprint: Optional[str] = None
+        self.fetched_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.failed_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def age(self) -> Optional[float]:
+        if self.fetched_at is None:
+            return None
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+    def is_due(self) -> bool:
+        if self.failed_at and (datetime.now() - self.failed_at).total_seconds() < RETRY_AFTER_FAILURE:
+            return False
+        age = self.age()
+        return age is None or age >= self.source.ttl
+
+
+class SourceScheduler:
+    """
+    Refreshes due sources concurrently and merges their results.
+    Follows the given source list, so sources registered later are picked up.
+    """
+
+    def __init__(self, sources: List[SubsidySource]):
+        self.sources = sources
+        self._states: Dict[str, SourceState] = {}
+
+    @property
+    def states(self) -> List[SourceState]:
+        """One state per source, in registry (priority) order"""
+        states = []
+        for source in self.sources:
+            state = self._states.get(source.name)
+            if state is None:
+                state = self._states[source.name] = SourceState(source)
+            states.append(state)
+        return states
+
+    async def _refresh(self, state: SourceState):
+        source = state.source
+        try:
+            raw = await asyncio.wait_for(source.fetch(), REFRESH_TIMEOUT)
+            fingerprint = source.fingerprint(raw)
+            if fingerprint != state.fingerprint:
+                # Parsing is CPU-bound (BeautifulSoup), keep it off the event loop
+                items = await asyncio.to_thread(source.parse, raw)
+                if not items:
+                    raise ValueError("source returned no subsidies")
+                state.items = items
+                state.fingerprint = fingerprint
+            state.fetched_at = datetime.now()
+            state.error = None
+            state.failed_at = None
+        except Exception as e:
+            state.error = f"{type(e).__name__}: {e}"
+            state.failed_at = datetime.now()
+            print(f"Refreshing source {source.name} failed: {state.error}")
+
+    async def refresh(self, wait: Optional[float] = None):
+        """
+        Start refreshes for every due source and wait up to `wait` seconds
+        (SOURCE_REFRESH_WAIT by default). Refreshes still running afterwards
+        finish in the background.
+        """
+        wait = REFRESH_WAIT if wait is None else wait
+        for state in self.states:
+            if state.is_due() and (state.task is None or state.task.done()):
+                state.task = asyncio.create_task(self._refresh(state))
+
+        running = [s.task for s in self.states if s.task is not None and not s.task.done()]
+        if running:
+            await asyncio.wait(running, timeout=wait)
+
+    def catalog(self) -> List[Dict]:
+        """Merge all sources into one list, de-duplicated on normalized scheme id"""
+        merged: Dict[str, Dict] = {}
+        for state in self.states:
+            for item in state.items:
+                scheme_id = state.source.scheme_id(item)
+                existing = merged.get(scheme_id)
+                if existing is None:
+                    merged[scheme_id] = {**item, "schemeId": scheme_id, "sources": [state.source.name]}
+                    continue
+                # Fill gaps from lower-priority sources, never overwrite
+                for key, value in item.items():
+                    if value and not existing.get(key):
+                        existing[key] = value
+                existing["sources"].append(state.source.name)
+        return list(merged.values())
+
+    def version(self) -> Optional[str]:
+        """Combined fingerprint of all sources with data, None when there is none"""
+        parts = [f"{s.source.name}:{s.fingerprint}" for s in self.states if s.items]
+        return "|".join(parts) or None
+
+    def max_age(self) -> int:
+        """Seconds until the first source with data is due for a refresh"""
+        remaining = [s.source.ttl - s.age() for s in self.states if s.items]
+        return int(min(remaining)) if remaining else 0
+
+    def last_updated(self) -> Optional[datetime]:
+        times = [s.fetched_at for s in self.states if s.items]
+        return max(times) if times else None
+
+    def labels(self) -> List[str]:
+        return [s.source.label for s in self.states if s.items]
+
+    def status(self) -> List[Dict]:
+        return [{
+            "name": s.source.name,
+            "label": s.source.label,
+            "count": len(s.items),
+            "lastUpdated": s.fetched_at.isoformat() if s.fetched_at else None,
+            "error": s.error
+        } for s in self.states]
+
+
+scheduler = SourceScheduler(SOURCE_REGISTRY)
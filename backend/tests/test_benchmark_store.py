@@ -0,0 +1,93 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+import benchmark_store
+from benchmark_store import COLUMNS, SECTORS, BenchmarkStore, SortedIndex
+
+
+@pytest.fixture
+def small_merge_threshold(monkeypatch):
+    monkeypatch.setattr(benchmark_store, "MERGE_THRESHOLD", 8)
+
+
+def nearest_rank(values, q):
+    ordered = np.sort(np.asarray(values, dtype=np.float64))
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@pytest.mark.parametrize("main_size, buffer_size", [(0, 1), (1, 0), (5, 5), (20, 3), (2, 7), (0, 7)])
+def test_value_at_matches_sorted_union(small_merge_threshold, main_size, buffer_size):
+    rng = random.Random(main_size * 100 + buffer_size)
+    index = SortedIndex(np.array([rng.choice([10.0, 20.0, rng.uniform(0, 100)]) for _ in range(main_size)]))
+    for _ in range(buffer_size):
+        index.insert(rng.choice([10.0, 20.0, rng.uniform(0, 100)]))
+
+    expected = np.sort(np.concatenate([index.main, index.buffer]))
+    assert [index.value_at(rank) for rank in range(len(expected))] == list(expected)
+
+
+@pytest.mark.parametrize("sessions", [1, 7, 8, 9, 16, 17, 30])
+def test_quantiles_and_percentiles_match_numpy(tmp_path, small_merge_threshold, sessions):
+    rng = random.Random(sessions)
+    store = BenchmarkStore(str(tmp_path))
+    rows = []
+    for _ in range(sessions):
+        utilization = float(np.float32(rng.choice([25.0, rng.uniform(0, 100)])))
+        sector = rng.choice(SECTORS[:3])
+        store.append(utilization, sector)
+        rows.append((utilization, sector))
+
+    values = [u for u, _ in rows]
+    for q in [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]:
+        assert store.quantile(q) == round(nearest_rank(values, q), 1)
+
+    for probe in [0.0, 25.0, 50.0, 99.9, 100.0]:
+        assert store.percentile_of(probe) == round(100.0 * sum(u < probe for u in values) / sessions, 1)
+        for sector in SECTORS[:3]:
+            in_sector = [u for u, s in rows if s == sector]
+            expected = round(100.0 * sum(u < probe for u in in_sector) / len(in_sector), 1) if in_sector else None
+            assert store.percentile_of(probe, sector) == expected
+
+
+def test_refresh_picks_up_bulk_rows_from_other_workers(tmp_path, small_merge_threshold):
+    reader = BenchmarkStore(str(tmp_path))
+    writer = BenchmarkStore(str(tmp_path))
+    reader_values = [10.0, 90.0]
+    for value in reader_values:
+        reader.append(value, "Retail")
+
+    # More rows than MERGE_THRESHOLD arrive at once and are indexed in bulk
+    writer_values = [float(v) for v in range(20, 40)]
+    for value in writer_values:
+        writer.append(value, "Healthcare")
+    reader.refresh()
+
+    values = reader_values + writer_values
+    assert reader.count == len(values)
+    assert reader.quantile(0.5) == round(nearest_rank(values, 0.5), 1)
+    assert reader.percentile_of(30.0, "Healthcare") == 50.0
+    assert reader.sector_means() == {"Healthcare": 29.5, "Retail": 50.0}
+
+
+def test_append_repairs_torn_row(tmp_path):
+    store = BenchmarkStore(str(tmp_path))
+    store.append(40.0, "Technology", "small")
+    store.append(60.0, "Retail", "large")
+
+    # A writer died after writing sector and size but before utilization
+    for column in ("sector", "size"):
+        with open(os.path.join(str(tmp_path), f"{column}.bin"), "ab") as f:
+            f.write(np.array([SECTORS.index("Healthcare")], dtype=COLUMNS[column]).tobytes())
+
+    store.append(80.0, "Services", "micro")
+
+    for column, dtype in COLUMNS.items():
+        assert os.path.getsize(os.path.join(str(tmp_path), f"{column}.bin")) == 3 * np.dtype(dtype).itemsize
+
+    reopened = BenchmarkStore(str(tmp_path))
+    assert reopened.count == 3
+    assert reopened.sector_means() == {"Technology": 40.0, "Retail": 60.0, "Services": 80.0}
+    assert reopened.size_means() == {"micro": 80.0, "small": 40.0, "large": 60.0}
@@ -0,0 +1,93 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+from fastapi import Request
+
+import http_cache
+from http_cache import CatalogResponseCache, negotiate_encoding
+
+
+LAST_MODIFIED = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+
+
+def make_request(**headers) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/subsidies",
+        "headers": [(k.replace("_", "-").lower().encode(), v.encode()) for k, v in headers.items()],
+    })
+
+
+def respond(cache, request, body=None):
+    body = body if body is not None else {"items": ["x" * 50] * 100}
+    return cache.respond(request, key="catalog:v1", build=lambda: body, max_age=60, last_modified=LAST_MODIFIED)
+
+
+@pytest.fixture
+def gzip_only(monkeypatch):
+    monkeypatch.setattr(http_cache, "brotli", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0, identity", None),
+    ("*", "gzip"),
+    ("*;q=0", None),
+    ("*, gzip;q=0", None),
+    ("deflate, gzip;q=0.5", "gzip"),
+    ("", None),
+])
+def test_negotiate_encoding_gzip_only(gzip_only, header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+@pytest.mark.skipif(http_cache.brotli is None, reason="brotli not installed")
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, br", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("*", "br"),
+])
+def test_negotiate_encoding_prefers_brotli(header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_compresses_large_bodies(gzip_only):
+    response = respond(CatalogResponseCache(), make_request(accept_encoding="gzip"))
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert gzip.decompress(response.body).startswith(b'{"items"')
+
+
+def test_small_bodies_are_not_compressed(gzip_only, monkeypatch):
+    monkeypatch.setattr(http_cache, "COMPRESSION_MIN_SIZE", 1024)
+    response = respond(CatalogResponseCache(), make_request(accept_encoding="gzip"), body={"items": []})
+    assert "content-encoding" not in response.headers
+    assert response.body == b'{"items":[]}'
+
+
+def test_matching_etag_is_not_modified():
+    cache = CatalogResponseCache()
+    etag = respond(cache, make_request()).headers["etag"]
+
+    assert respond(cache, make_request(if_none_match=etag)).status_code == 304
+    assert respond(cache, make_request(if_none_match=f'W/"other", {etag}')).status_code == 304
+    assert respond(cache, make_request(if_none_match="*")).status_code == 304
+    assert respond(cache, make_request(if_none_match='W/"other"')).status_code == 200
+
+
+def test_if_modified_since():
+    cache = CatalogResponseCache()
+    last_modified = format_datetime(LAST_MODIFIED, usegmt=True)
+    earlier = format_datetime(LAST_MODIFIED - timedelta(seconds=1), usegmt=True)
+
+    response = respond(cache, make_request(if_modified_since=last_modified))
+    assert response.status_code == 304
+    assert response.headers["last-modified"] == last_modified
+    assert respond(cache, make_request(if_modified_since=earlier)).status_code == 200
+    assert respond(cache, make_request(if_modified_since="not a date")).status_code == 200
+    # If-None-Match takes precedence over If-Modified-Since
+    assert respond(cache, make_request(if_none_match='W/"other"', if_modified_since=last_modified)).status_code == 200
@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+import rate_limit
+from rate_limit import MemoryBackend, RateLimitConfig, RateLimitMiddleware, parse_rate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def make_config(**overrides) -> RateLimitConfig:
+    config = RateLimitConfig()
+    config.enabled = True
+    config.redis_url = ""
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+def make_scope(method="GET", path="/api/subsidies", client="10.0.0.1", forwarded_for=None):
+    headers = []
+    if forwarded_for is not None:
+        headers.append((b"x-forwarded-for", forwarded_for.encode()))
+    return {"type": "http", "method": method, "path": path, "headers": headers, "client": (client, 50000)}
+
+
+def test_parse_rate():
+    assert parse_rate("10/60") == (10 / 60, 10)
+    assert parse_rate("5") == (5, 5)
+
+
+@pytest.mark.parametrize("value", ["0/60", "10/0", "-1/60", "ten/60", "10/-5"])
+def test_parse_rate_rejects_invalid(value):
+    with pytest.raises(ValueError):
+        parse_rate(value)
+
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    backend = MemoryBackend()
+    rate, burst = parse_rate("3/60")
+
+    for _ in range(3):
+        assert asyncio.run(backend.take("client", rate, burst)) == 0
+    assert asyncio.run(backend.take("client", rate, burst)) == pytest.approx(20)
+
+    # One token back after 20 seconds, other clients unaffected
+    clock.now += 20
+    assert asyncio.run(backend.take("client", rate, burst)) == 0
+    assert asyncio.run(backend.take("other", rate, burst)) == 0
+
+
+def test_buckets_are_evicted_least_recently_used(clock, monkeypatch):
+    monkeypatch.setattr(MemoryBackend, "MAX_BUCKETS", 3)
+    backend = MemoryBackend()
+    for key in ["a", "b", "c", "a", "d"]:
+        asyncio.run(backend.take(key, 1, 1))
+    assert list(backend.buckets) == ["c", "a", "d"]
+
+
+@pytest.mark.parametrize("hops, forwarded_for, expected", [
+    (0, "1.1.1.1", "10.0.0.1"),
+    (1, "1.1.1.1", "1.1.1.1"),
+    # Entries left of the trusted hops are client-controlled and ignored
+    (1, "6.6.6.6, 1.1.1.1", "1.1.1.1"),
+    (2, "6.6.6.6, 1.1.1.1, 172.16.0.2", "1.1.1.1"),
+    # Fewer entries than trusted hops: fall back to the socket address
+    (2, "1.1.1.1", "10.0.0.1"),
+    (1, None, "10.0.0.1"),
+])
+def test_client_id_uses_trusted_hops(hops, forwarded_for, expected):
+    middleware = RateLimitMiddleware(None, make_config(proxy_hops=hops))
+    assert middleware.client_id(make_scope(forwarded_for=forwarded_for)) == expected
+
+
+def run_requests(middleware, scopes):
+    """Send scopes concurrently; returns response status per request"""
+    async def call(scope):
+        statuses = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        await middleware(scope, None, send)
+        return statuses[0]
+
+    async def main():
+        return await asyncio.gather(*(call(scope) for scope in scopes))
+
+    return asyncio.run(main())
+
+
+def test_rate_limited_requests_get_429():
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    config = make_config(rates={**make_config().rates, "read": (0.001, 2)})
+    middleware = RateLimitMiddleware(app, config)
+
+    statuses = run_requests(middleware, [make_scope(), make_scope(), make_scope(), make_scope(client="10.0.0.2")])
+    assert statuses == [200, 200, 429, 200]
+
+
+def test_inflight_cap_rejects_with_503():
+    release = None
+
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    config = make_config(max_inflight={"upload": 2, "analyze": 2})
+    middleware = RateLimitMiddleware(app, config)
+    scopes = [make_scope("POST", "/api/upload", client=f"10.0.0.{i}") for i in range(3)]
+
+    async def main():
+        nonlocal release
+        release = asyncio.Event()
+        statuses = []
+
+        async def call(scope):
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+            await middleware(scope, None, send)
+
+        tasks = [asyncio.create_task(call(scope)) for scope in scopes]
+        await asyncio.sleep(0.01)
+        # Two requests are held in the app, the third is turned away
+        assert statuses == [503]
+        assert middleware.inflight["upload"] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        return statuses
+
+    assert asyncio.run(main()) == [503, 200, 200]
+    assert middleware.inflight["upload"] == 0
@@ -0,0 +1,11 @@
+from check_startup import IMPORT_BUDGET_MS, LAZY_MODULES, measure_imports
+
+
+def test_import_main_within_budget_and_lazy():
+    times = measure_imports()
+
+    total_ms = times["main"] / 1000
+    assert total_ms <= IMPORT_BUDGET_MS, f"import main took {total_ms:.0f} ms, over the {IMPORT_BUDGET_MS:.0f} ms budget"
+
+    eager = [name for name in LAZY_MODULES if name in times]
+    assert not eager, f"modules imported at startup but should be lazy: {', '.join(eager)}"
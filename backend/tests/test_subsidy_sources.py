@@ -0,0 +1,79 @@
+import asyncio
+
+import subsidy_sources
+from subsidy_sources import SourceScheduler, SubsidySource, register_source
+
+
+class StaticSource(SubsidySource):
+    def __init__(self, name, items):
+        self.name = name
+        self.label = name.upper()
+        self.items = items
+
+    async def fetch(self):
+        return self.items
+
+    def parse(self, raw):
+        return [dict(item) for item in raw]
+
+
+def test_source_registered_after_scheduler_is_merged(monkeypatch):
+    registry = []
+    monkeypatch.setattr(subsidy_sources, "SOURCE_REGISTRY", registry)
+    scheduler = SourceScheduler(registry)
+
+    register_source(StaticSource("national", [
+        {"id": "wbso-2024", "name": "WBSO", "description": ""},
+        {"id": "mia-vamil-2024", "name": "MIA/Vamil", "description": "Milieu"},
+    ]))
+    register_source(StaticSource("regional", [
+        {"id": "wbso", "name": "wbso", "description": "Van de provincie"},
+        {"id": "innovatie-noord", "name": "Innovatie Noord", "description": "Regionaal"},
+    ]))
+
+    asyncio.run(scheduler.refresh(wait=1))
+    catalog = {item["schemeId"]: item for item in scheduler.catalog()}
+
+    assert list(catalog) == ["wbso", "mia-vamil", "innovatie-noord"]
+    # Higher-priority source wins, gaps are filled from the later one
+    assert catalog["wbso"]["id"] == "wbso-2024"
+    assert catalog["wbso"]["description"] == "Van de provincie"
+    assert catalog["wbso"]["sources"] == ["national", "regional"]
+    assert catalog["innovatie-noord"]["sources"] == ["regional"]
+    assert scheduler.labels() == ["NATIONAL", "REGIONAL"]
+
+
+def test_partial_rvo_outage_keeps_last_good_catalog(monkeypatch):
+    import rvo_scraper
+    from subsidy_sources import RVOSource
+
+    failing = set()
+    run = {"count": 0}
+
+    async def fetch_page(self, url):
+        if url in failing:
+            return None
+        return f"<html><h1>{url}</h1><p class='intro'>Run {run['count']}</p></html>"
+
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr(rvo_scraper.RVOSubsidyScraper, "fetch_page", fetch_page)
+    monkeypatch.setattr(rvo_scraper.asyncio, "sleep", no_sleep)
+    scheduler = SourceScheduler([RVOSource()])
+    state = scheduler.states[0]
+
+    asyncio.run(scheduler.refresh(wait=5))
+    pages = len(rvo_scraper.RVOSubsidyScraper.SUBSIDY_SOURCES)
+    assert len(state.items) == pages
+    version = scheduler.version()
+
+    # Next refresh: pages changed, but one of them fails to load
+    run["count"] += 1
+    failing.add(rvo_scraper.RVOSubsidyScraper.SUBSIDY_SOURCES[0]["url"])
+    state.fetched_at = None
+    asyncio.run(scheduler.refresh(wait=5))
+
+    assert len(state.items) == pages
+    assert scheduler.version() == version
+    assert "WBSO" in scheduler.status()[0]["error"]
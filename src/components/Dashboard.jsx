@@ -14,6 +14,7 @@ import {
     Download
 } from 'lucide-react';
 import GlassCard from './GlassCard';
+import api from '../services/api';
 
 /**
  * Dashboard - Main panic UI displaying capital leakage analysis
@@ -59,7 +60,13 @@ const Dashboard = ({
     };
 
     const handleExportCSV = () => {
-        // Generate CSV content
+        // Results stored on the backend are exported server-side (streamed, all columns)
+        if (backendAvailable && data?.sessionId && data.sessionId !== 'mock-session') {
+            window.location.href = api.getResultsExportUrl(data.sessionId, 'csv');
+            return;
+        }
+
+        // Demo data only exists in the browser - generate CSV content here
         const headers = ['Item', 'Subsidy', 'Category', 'Amount'];
         const rows = subsidies.map(s => [s.item, s.subsidy, s.category, s.amount]);
 
@@ -32,10 +32,16 @@ export async function uploadDocuments(files) {
 /**
  * Trigger AI analysis on uploaded documents
  * @param {string} sessionId - Session ID from upload
+ * @param {{sector?: string, size?: string}} [profile] - Optional company profile for peer benchmarks
  * @returns {Promise<AnalysisResult>}
  */
-export async function analyzeDocuments(sessionId) {
-    const response = await fetch(`${API_BASE_URL}/api/analyze/${sessionId}`, {
+export async function analyzeDocuments(sessionId, { sector, size } = {}) {
+    const params = new URLSearchParams();
+    if (sector) params.set('sector', sector);
+    if (size) params.set('size', size);
+    const query = params.toString() ? `?${params}` : '';
+
+    const response = await fetch(`${API_BASE_URL}/api/analyze/${sessionId}${query}`, {
         method: 'POST',
     });
 
@@ -139,6 +145,16 @@ export async function cancelEmailAlert(alertId) {
     return response.json();
 }
 
+/**
+ * Get the download URL for a server-side export of analysis results
+ * @param {string} sessionId - Session ID
+ * @param {'csv'|'xlsx'} format - Export format
+ * @returns {string}
+ */
+export function getResultsExportUrl(sessionId, format = 'csv') {
+    return `${API_BASE_URL}/api/results/${sessionId}/export?format=${format}`;
+}
+
 /**
  * Get benchmark data
  * @returns {Promise<BenchmarkData>}
@@ -178,5 +194,6 @@ export default {
     setupEmailAlert,
     cancelEmailAlert,
     getBenchmark,
+    getResultsExportUrl,
     checkBackendHealth,
 };